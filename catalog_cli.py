@@ -0,0 +1,40 @@
+import argparse
+import pandas as pd
+from database import DatabaseManager, CATALOG_COLUMNS, init_db
+from data_manager import DataManager
+
+def main():
+    parser = argparse.ArgumentParser(description="Load or export the product catalog, e.g. for unattended nightly refreshes")
+    parser.add_argument('catalog', nargs='?', help="CSV or XLSX catalog file to load")
+    parser.add_argument('--row-by-row', action='store_true',
+                        help="Use the batched ORM importer instead of the bulk staging loader")
+    parser.add_argument('--rejects', help="Write rows that failed validation to this CSV file")
+    parser.add_argument('--export', help="Write a snapshot of the whole catalog to this CSV file")
+    args = parser.parse_args()
+
+    print("Initializing database...")
+    init_db()
+    if args.export:
+        with DatabaseManager() as db, open(args.export, 'w', newline='') as file:
+            # Header first, so an empty catalog still gives a valid CSV
+            pd.DataFrame(columns=CATALOG_COLUMNS).to_csv(file, index=False)
+            rows = 0
+            for batch in db.iter_product_batches():
+                batch.to_csv(file, index=False, header=False)
+                rows += len(batch)
+        print(f"Exported {rows} products to {args.export}")
+    if not args.catalog:
+        return 0
+
+    # Same validation as uploads from the UI
+    data_manager = DataManager()
+    with open(args.catalog, 'rb') as file:
+        success, message = data_manager.import_catalog(file, bulk=not args.row_by_row)
+    print(message)
+    if args.rejects and not data_manager.rejected_rows.empty:
+        data_manager.rejected_rows.to_csv(args.rejects, index=False)
+        print(f"Rejected rows written to {args.rejects}")
+    return 0 if success else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+import pandas as pd
+from dataclasses import dataclass
+
+# Column order used by the cost sheet editor and the CSV export/restore format
+COST_SHEET_COLUMNS = [
+    'Manufacturer', 'Product Type', 'Product Code', 'Description', 'Unit Cost (£)', 'Discount (%)',
+    'Discounted Cost (£)', 'Quantity', 'Total (£)', 'Pre-Discount Total (£)', 'Group', 'Supplier'
+]
+
+@dataclass(slots=True)
+class CostItem:
+    """One cost sheet line. Only the inputs are stored; costs and totals are
+    derived on read so they can never drift from quantity or discount."""
+    manufacturer: str
+    product_type: str
+    product_code: str
+    description: str
+    unit_cost: float
+    discount: float
+    quantity: int
+    group: str
+    supplier: str = ''
+
+    @property
+    def discounted_cost(self):
+        return self.unit_cost * (1 - self.discount / 100)
+
+    @property
+    def total(self):
+        return self.discounted_cost * self.quantity
+
+    @property
+    def pre_discount_total(self):
+        return self.unit_cost * self.quantity
+
+def items_to_dataframe(items):
+    # Build the stored columns once, then derive the cost columns vectorized
+    df = pd.DataFrame({
+        'Manufacturer': [item.manufacturer for item in items],
+        'Product Type': [item.product_type for item in items],
+        'Product Code': [item.product_code for item in items],
+        'Description': [item.description for item in items],
+        'Unit Cost (£)': pd.Series([item.unit_cost for item in items], dtype=float),
+        'Discount (%)': pd.Series([item.discount for item in items], dtype=float),
+        'Quantity': pd.Series([item.quantity for item in items], dtype=int),
+        'Group': [item.group for item in items],
+        'Supplier': [item.supplier for item in items]
+    })
+    df['Discounted Cost (£)'] = df['Unit Cost (£)'] * (1 - df['Discount (%)'] / 100)
+    df['Total (£)'] = df['Discounted Cost (£)'] * df['Quantity']
+    df['Pre-Discount Total (£)'] = df['Unit Cost (£)'] * df['Quantity']
+    return df[COST_SHEET_COLUMNS]
+
+@dataclass(slots=True)
+class SheetSummary:
+    """Totals for a cost sheet. Each breakdown frame is indexed by its key and
+    has 'Total (£)', 'Pre-Discount Total (£)', 'Savings (£)' and 'Items'
+    columns, with rows in order of first appearance on the sheet."""
+    total: float
+    pre_discount_total: float
+    by_group: pd.DataFrame
+    by_supplier: pd.DataFrame
+    by_manufacturer: pd.DataFrame
+
+    @property
+    def savings(self):
+        return self.pre_discount_total - self.total
+
+    @property
+    def savings_percentage(self):
+        return (self.savings / self.pre_discount_total * 100) if self.pre_discount_total > 0 else 0
+
+def summarize_sheet(items):
+    df = items_to_dataframe(items)
+    df['Supplier'] = df['Supplier'].fillna('')
+    df['Items'] = 1
+
+    # One groupby over the finest key; every rollup is a sum over its result
+    base = df.groupby(['Group', 'Supplier', 'Manufacturer'], sort=False, dropna=False)[
+        ['Total (£)', 'Pre-Discount Total (£)', 'Items']
+    ].sum()
+
+    def rollup(level):
+        out = base.groupby(level=level, sort=False, dropna=False).sum()
+        out.insert(2, 'Savings (£)', out['Pre-Discount Total (£)'] - out['Total (£)'])
+        return out
+
+    return SheetSummary(
+        total=float(base['Total (£)'].sum()),
+        pre_discount_total=float(base['Pre-Discount Total (£)'].sum()),
+        by_group=rollup('Group'),
+        by_supplier=rollup('Supplier'),
+        by_manufacturer=rollup('Manufacturer')
+    )
@@ -1,67 +1,126 @@
+import numpy as np
 import pandas as pd
-from database import DatabaseManager
+from database import DatabaseManager, CATALOG_COLUMNS
+from query_cache import catalog_cache
+
+REQUIRED_COLUMNS = ['manufacturer', 'product_type', 'description', 'product_code', 'unit_cost']
+TEXT_COLUMNS = ['manufacturer', 'product_type', 'description', 'product_code', 'supplier']
 
 class DataManager:
     def __init__(self):
         self.db = DatabaseManager()
+        self.rejected_rows = pd.DataFrame()  # Rows dropped by the last import_catalog call
 
+    # Each lookup is a small SQL query; its result is shared by all sessions
+    # through catalog_cache until the next catalog write
     def get_manufacturers(self):
-        products = self.db.get_all_products()
-        return sorted(set(p['manufacturer'] for p in products))
+        return catalog_cache.get_or_compute(('manufacturers',), self.db.get_manufacturers)
 
     def get_product_types(self, manufacturer):
-        products = self.db.get_all_products()
-        return sorted(set(p['product_type'] for p in products if p['manufacturer'] == manufacturer))
+        return catalog_cache.get_or_compute(
+            ('product_types', manufacturer),
+            lambda: self.db.get_product_types(manufacturer)
+        )
 
     def get_product_descriptions(self, manufacturer, product_type):
-        products = self.db.get_all_products()
-        descriptions = [
-            f"{p['description']} ({p['product_code']})"  # Include product code in description
-            for p in products 
-            if p['manufacturer'] == manufacturer and p['product_type'] == product_type
-        ]
-        return sorted(descriptions)
+        # Descriptions include the product code, e.g. "Widget (W-100)"
+        return catalog_cache.get_or_compute(
+            ('product_descriptions', manufacturer, product_type),
+            lambda: self.db.get_product_descriptions(manufacturer, product_type)
+        )
 
     def get_product_details_by_description(self, manufacturer, product_type, description):
-        products = self.db.get_all_products()
-        for product in products:
-            if (product['manufacturer'] == manufacturer and 
-                product['product_type'] == product_type and 
-                f"{product['description']} ({product['product_code']})" == description):
-                return product
-        return None
-
-    def import_catalog(self, file):   
-                try:
-                    # Read Excel file
-                    if file.name.endswith('.xlsx'):
-                        df = pd.read_excel(file)
-                    else:
-                        df = pd.read_csv(file)
-
-                    # Validate column names
-                    expected_columns = ['manufacturer', 'product_type', 'description', 'product_code', 'unit_cost']
-                    if not all(col in df.columns for col in expected_columns):
-                        return False, "File must contain columns: manufacturer, product_type, description, product_code, unit_cost"
-
-                    # Clean and validate data
-                    df = df[expected_columns + ['supplier', 'discount'] if 'supplier' in df.columns else expected_columns]
-
-                    # Convert unit_cost to float and product_code to string
-                    try:
-                        df['unit_cost'] = df['unit_cost'].astype(float)
-                        df['product_code'] = df['product_code'].astype(str)
-
-                        # Handle missing or blank discount values
-                        if 'discount' in df.columns:
-                            df['discount'] = df['discount'].fillna(0).astype(float)  # Replace NaN with 0
-                        else:
-                            df['discount'] = 0.0  # Add discount column with default value 0
-                    except Exception as e:
-                        return False, f"Error processing data: {str(e)}"
-
-                    # Import to database
-                    return self.db.import_catalog(df)
-
-                except Exception as e:
-                    return False, f"Error importing file: {str(e)}"
\ No newline at end of file
+        return catalog_cache.get_or_compute(
+            ('product_details', manufacturer, product_type, description),
+            lambda: self.db.get_product_by_description(manufacturer, product_type, description)
+        )
+
+    def import_catalog(self, file, bulk=False):
+        """Import a CSV/XLSX catalog. Valid rows are imported even when others
+        fail validation; the failures are kept in self.rejected_rows."""
+        self.rejected_rows = pd.DataFrame()
+        try:
+            # Read text columns as strings so pandas doesn't turn codes like 101 into 101.0
+            text_dtypes = {col: str for col in TEXT_COLUMNS}
+            if file.name.endswith('.xlsx'):
+                df = pd.read_excel(file, dtype=text_dtypes)
+            else:
+                df = pd.read_csv(file, dtype=text_dtypes)
+
+            # Validate column names
+            if not all(col in df.columns for col in REQUIRED_COLUMNS):
+                return False, "File must contain columns: manufacturer, product_type, description, product_code, unit_cost"
+
+            valid, self.rejected_rows = validate_catalog(df)
+            rejected_note = f" ({len(self.rejected_rows)} rows rejected)" if len(self.rejected_rows) else ""
+            if valid.empty:
+                return False, f"No valid rows to import{rejected_note}"
+
+            # Import to database
+            success, message = self.db.import_catalog(valid, bulk=bulk)
+            return success, message + rejected_note
+
+        except Exception as e:
+            return False, f"Error importing file: {str(e)}"
+
+def validate_catalog(df):
+    """Clean a raw catalog frame column-wise.
+
+    Returns (valid, rejected): `valid` holds the typed rows ready for import,
+    de-duplicated on product_code with the last occurrence winning. `rejected`
+    holds the original catalog-column values of every other row plus its file
+    row number and the reasons it was dropped.
+    """
+    raw = df.reset_index(drop=True)
+    clean = pd.DataFrame(index=raw.index)
+    reasons = pd.Series('', index=raw.index)
+
+    def reject(mask, reason):
+        nonlocal reasons
+        reasons = reasons.mask(mask, reasons + reason + '; ')
+
+    # Trim text columns; blanks count as missing
+    for col in TEXT_COLUMNS:
+        if col not in raw.columns:
+            clean[col] = None
+            continue
+        values = raw[col].astype(str).str.strip()
+        values = values.where(raw[col].notna() & (values != ''))
+        clean[col] = values
+        if col in REQUIRED_COLUMNS:
+            reject(values.isna(), f"missing {col}")
+
+    unit_cost = pd.to_numeric(raw['unit_cost'], errors='coerce')
+    reject(raw['unit_cost'].isna(), "missing unit_cost")
+    reject(unit_cost.isna() & raw['unit_cost'].notna(), "unit_cost is not a number")
+    # to_numeric accepts "inf"/"-inf"
+    unit_cost_infinite = unit_cost.notna() & ~np.isfinite(unit_cost)
+    reject(unit_cost_infinite, "unit_cost is not a finite number")
+    reject((unit_cost < 0) & ~unit_cost_infinite, "unit_cost is negative")
+    clean['unit_cost'] = unit_cost
+
+    # Missing or blank discounts default to 0
+    if 'discount' in raw.columns:
+        discount_raw = raw['discount'].where(raw['discount'].astype(str).str.strip() != '')
+        discount = pd.to_numeric(discount_raw, errors='coerce')
+        reject(discount.isna() & discount_raw.notna(), "discount is not a number")
+        discount_infinite = discount.notna() & ~np.isfinite(discount)
+        reject(discount_infinite, "discount is not a finite number")
+        reject(((discount < 0) | (discount > 100)) & ~discount_infinite, "discount outside 0-100")
+        clean['discount'] = discount.fillna(0.0)
+    else:
+        clean['discount'] = 0.0
+
+    # Last occurrence of a product code wins, among rows that passed the checks
+    is_valid = reasons == ''
+    superseded = is_valid & clean['product_code'].where(is_valid).duplicated(keep='last')
+    reject(superseded, "duplicate product_code, superseded by a later row")
+    is_valid = reasons == ''
+
+    # Only the catalog columns are reported, so extra input columns (e.g. one
+    # named "row" or "reason") can't collide with the report's own columns
+    rejected = raw.loc[~is_valid, [col for col in CATALOG_COLUMNS if col in raw.columns]].copy()
+    rejected.insert(0, 'row', rejected.index + 2)  # File line number, after the header row
+    rejected['reason'] = reasons[~is_valid].str.rstrip('; ')
+    valid = clean.loc[is_valid, CATALOG_COLUMNS].reset_index(drop=True)
+    return valid, rejected.reset_index(drop=True)
@@ -1,22 +1,41 @@
-import streamlit as st
 import os
+import io
+import threading
 import pandas as pd
-from sqlalchemy import create_engine, Column, String, Float, Integer
+from sqlalchemy import create_engine, Column, String, Float, Integer, Index, text, select, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from query_cache import catalog_cache
 
-# =================================================================
-# TEMPORARY WORKAROUND - DELETE BEFORE COMMITTING TO GIT!
-# Replace with your actual Supabase credentials
-DATABASE_URL = st.secrets["DATABASE"]["URL"]
-# =================================================================
-
-# Initialize database
-engine = create_engine(DATABASE_URL)
+# The engine is created on first use, not at import time, so importing this
+# module (app reloads, the CLI, tools) doesn't read secrets or open a pool.
+_engine = None
+_engine_lock = threading.Lock()
+_schema_ready = False
+_schema_lock = threading.Lock()
+Session = sessionmaker()
 Base = declarative_base()
 
+def get_database_url():
+    # DATABASE_URL in the environment (CLI, load tests) wins over Streamlit secrets
+    if os.environ.get('DATABASE_URL'):
+        return os.environ['DATABASE_URL']
+    import streamlit as st
+    return st.secrets["DATABASE"]["URL"]
+
+def get_engine():
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = create_engine(get_database_url())
+                Session.configure(bind=_engine)
+    return _engine
+
 class Product(Base):
     __tablename__ = 'products'
+    # Serves the manufacturer -> type -> description dropdown queries
+    __table_args__ = (Index('ix_products_manufacturer_type', 'manufacturer', 'product_type'),)
     
     id = Column(Integer, primary_key=True)
     manufacturer = Column(String, nullable=False)
@@ -39,13 +58,59 @@ class Product(Base):
             'discount': float(self.discount) if self.discount is not None else 0.0
         }
 
+# Columns loaded by the bulk importer, in staging/COPY order
+CATALOG_COLUMNS = ['manufacturer', 'product_type', 'description', 'product_code', 'unit_cost', 'supplier', 'discount']
+BULK_CHUNK_SIZE = 100000
+
+def merge_staging_statements(dialect_name):
+    """Set-based merge from products_staging: update rows whose values changed,
+    then insert new product codes. Unchanged rows aren't rewritten, and only
+    real inserts draw ids from the products.id sequence (an upsert would
+    consume one per staged row)."""
+    # SQLite spells the null-safe "not equal" as IS NOT
+    distinct = 'IS DISTINCT FROM' if dialect_name == 'postgresql' else 'IS NOT'
+    updated_columns = [col for col in CATALOG_COLUMNS if col != 'product_code']
+    update_sql = f"""
+        UPDATE products SET {', '.join(f'{col} = s.{col}' for col in updated_columns)}
+        FROM products_staging AS s
+        WHERE products.product_code = s.product_code
+        AND ({' OR '.join(f'products.{col} {distinct} s.{col}' for col in updated_columns)})
+    """
+    insert_sql = f"""
+        INSERT INTO products ({', '.join(CATALOG_COLUMNS)})
+        SELECT {', '.join('s.' + col for col in CATALOG_COLUMNS)} FROM products_staging AS s
+        WHERE NOT EXISTS (SELECT 1 FROM products AS p WHERE p.product_code = s.product_code)
+    """
+    return [update_sql, insert_sql]
+
+def product_columns(table, columns):
+    # Match Product.to_dict(): missing discounts read as 0.0
+    return [
+        func.coalesce(table.c.discount, 0.0).label('discount') if col == 'discount' else table.c[col]
+        for col in columns
+    ]
+
+def product_label(table):
+    # The "description (code)" label shown in the description dropdown
+    return (table.c.description + ' (' + table.c.product_code + ')').label('label')
+
 def init_db():
-    Base.metadata.create_all(engine)
-    Session = sessionmaker(bind=engine)
+    # create_all inspects the catalog, so run it once per process rather than
+    # for every DatabaseManager a new browser session creates
+    global _schema_ready
+    engine = get_engine()
+    if not _schema_ready:
+        with _schema_lock:
+            if not _schema_ready:
+                Base.metadata.create_all(engine)
+                # create_all skips tables that already exist, so add new indexes separately
+                for index in Product.__table__.indexes:
+                    index.create(engine, checkfirst=True)
+                _schema_ready = True
     return Session()
 
 def get_db():
-    Session = sessionmaker(bind=engine)
+    get_engine()
     return Session()
 
 class DatabaseManager:
@@ -59,13 +124,76 @@ class DatabaseManager:
         self.session.close()
     
     def get_all_products(self):
-        return [product.to_dict() for product in self.session.query(Product).all()]
+        # Same shape as Product.to_dict(), built from plain rows rather than ORM objects
+        columns = ['id'] + CATALOG_COLUMNS
+        return [
+            dict(zip(columns, row))
+            for batch in self.iter_product_batches(columns, as_frames=False)
+            for row in batch
+        ]
+
+    def get_manufacturers(self):
+        table = Product.__table__
+        return self._fetch_scalars(select(table.c.manufacturer).distinct().order_by(table.c.manufacturer))
+
+    def get_product_types(self, manufacturer):
+        table = Product.__table__
+        return self._fetch_scalars(
+            select(table.c.product_type).distinct()
+            .where(table.c.manufacturer == manufacturer)
+            .order_by(table.c.product_type)
+        )
+
+    def get_product_descriptions(self, manufacturer, product_type):
+        table = Product.__table__
+        label = product_label(table)
+        return self._fetch_scalars(
+            select(label)
+            .where(table.c.manufacturer == manufacturer, table.c.product_type == product_type)
+            .order_by(label)
+        )
+
+    def get_product_by_description(self, manufacturer, product_type, description):
+        """Look up a product by the "description (code)" label from get_product_descriptions."""
+        table = Product.__table__
+        columns = ['id'] + CATALOG_COLUMNS
+        statement = select(*product_columns(table, columns)).where(
+            table.c.manufacturer == manufacturer,
+            table.c.product_type == product_type,
+            product_label(table) == description
+        ).limit(1)
+        with get_engine().connect() as connection:
+            row = connection.execute(statement).first()
+        return dict(zip(columns, row)) if row is not None else None
+
+    def _fetch_scalars(self, statement):
+        with get_engine().connect() as connection:
+            return connection.execute(statement).scalars().all()
+
+    def iter_product_batches(self, columns=None, batch_size=10000, as_frames=True):
+        """Stream the catalog in batches of up to batch_size rows, selecting only
+        `columns` (default: CATALOG_COLUMNS). Yields DataFrames, or lists of
+        tuples when as_frames is False.
+
+        Rows are read through a Core connection with a server-side cursor where
+        the driver supports one, so nothing is loaded into the ORM session and
+        memory stays bounded by batch_size."""
+        columns = list(columns or CATALOG_COLUMNS)
+        table = Product.__table__
+        statement = select(*product_columns(table, columns)).order_by(table.c.id)
+
+        with get_engine().connect() as connection:
+            result = connection.execution_options(stream_results=True, yield_per=batch_size).execute(statement)
+            for partition in result.partitions():
+                rows = [tuple(row) for row in partition]
+                yield pd.DataFrame(rows, columns=columns) if as_frames else rows
     
     def add_product(self, product_data):
         try:
             product = Product(**product_data)
             self.session.add(product)
             self.session.commit()
+            catalog_cache.bump_version()
             return True, "Product added successfully"
         except Exception as e:
             self.session.rollback()
@@ -78,6 +206,7 @@ class DatabaseManager:
                 for key, value in product_data.items():
                     setattr(product, key, value)
                 self.session.commit()
+                catalog_cache.bump_version()
                 return True, "Product updated successfully"
             return False, "Product not found"
         except Exception as e:
@@ -90,15 +219,19 @@ class DatabaseManager:
             if product:
                 self.session.delete(product)
                 self.session.commit()
+                catalog_cache.bump_version()
                 return True, "Product deleted successfully"
             return False, "Product not found"
         except Exception as e:
             self.session.rollback()
             return False, f"Error deleting product: {str(e)}"
     
-    def import_catalog(self, df):
+    def import_catalog(self, df, bulk=False):
+        if bulk:
+            return self.bulk_import_catalog(df)
         try:
-            products_data = df.to_dict('records')
+            # Blank optional cells (e.g. supplier) become NULL rather than NaN
+            products_data = df.astype(object).where(df.notna(), None).to_dict('records')
             batch_size = 500
             for i in range(0, len(products_data), batch_size):
                 batch = products_data[i:i + batch_size]
@@ -117,12 +250,84 @@ class DatabaseManager:
                         new_product = Product(**product_data)
                         self.session.add(new_product)
                 self.session.commit()
+            catalog_cache.bump_version()
             return True, f"Successfully imported {len(products_data)} products"
         except Exception as e:
             self.session.rollback()
+            # Earlier batches may already be committed
+            catalog_cache.bump_version()
             return False, f"Error importing catalog: {str(e)}"
 
+    def bulk_import_catalog(self, df):
+        """Load a cleaned catalog DataFrame through a staging table and merge it
+        into products in a single transaction, so readers see either the old
+        or the new catalog, never a half-loaded one."""
+        df = df.reindex(columns=CATALOG_COLUMNS)
+        df['discount'] = df['discount'].fillna(0.0)
+        # The merge needs at most one staged row per product code
+        df = df.drop_duplicates('product_code', keep='last')
+        try:
+            if get_engine().dialect.name == 'postgresql':
+                self._copy_into_staging_postgres(df)
+            else:
+                self._insert_into_staging(df)
+            # Drop anything the ORM session cached before the merge
+            self.session.expire_all()
+            catalog_cache.bump_version()
+            return True, f"Successfully imported {len(df)} products"
+        except Exception as e:
+            return False, f"Error importing catalog: {str(e)}"
+
+    def _copy_into_staging_postgres(self, df):
+        connection = get_engine().raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.execute("""
+                CREATE UNLOGGED TABLE IF NOT EXISTS products_staging (
+                    manufacturer TEXT, product_type TEXT, description TEXT, product_code TEXT,
+                    unit_cost DOUBLE PRECISION, supplier TEXT, discount DOUBLE PRECISION
+                )
+            """)
+            # TRUNCATE takes an exclusive lock, so concurrent loads queue up here
+            cursor.execute("TRUNCATE products_staging")
+            copy_sql = f"COPY products_staging ({', '.join(CATALOG_COLUMNS)}) FROM STDIN WITH (FORMAT csv)"
+            for start in range(0, len(df), BULK_CHUNK_SIZE):
+                buffer = io.StringIO()
+                df.iloc[start:start + BULK_CHUNK_SIZE].to_csv(buffer, index=False, header=False)
+                buffer.seek(0)
+                cursor.copy_expert(copy_sql, buffer)
+            for statement in merge_staging_statements('postgresql'):
+                cursor.execute(statement)
+            cursor.execute("TRUNCATE products_staging")
+            connection.commit()
+        except Exception:
+            connection.rollback()
+            raise
+        finally:
+            connection.close()
+
+    def _insert_into_staging(self, df):
+        # Portable fallback (SQLite): temp staging table filled with executemany
+        records = df.astype(object).where(df.notna(), None).to_dict('records')
+        with get_engine().begin() as connection:
+            connection.execute(text("""
+                CREATE TEMPORARY TABLE IF NOT EXISTS products_staging (
+                    manufacturer TEXT, product_type TEXT, description TEXT, product_code TEXT,
+                    unit_cost FLOAT, supplier TEXT, discount FLOAT
+                )
+            """))
+            connection.execute(text("DELETE FROM products_staging"))
+            insert_sql = text(
+                f"INSERT INTO products_staging ({', '.join(CATALOG_COLUMNS)}) "
+                f"VALUES ({', '.join(':' + col for col in CATALOG_COLUMNS)})"
+            )
+            for start in range(0, len(records), BULK_CHUNK_SIZE):
+                connection.execute(insert_sql, records[start:start + BULK_CHUNK_SIZE])
+            for statement in merge_staging_statements(connection.dialect.name):
+                connection.execute(text(statement))
+            connection.execute(text("DROP TABLE products_staging"))
+
 if __name__ == "__main__":
     print("Initializing database...")
     init_db()
-    print("Temporary database setup complete. REMOVE HARDCODED CREDENTIALS BEFORE COMMITTING!")
+    print("Database setup complete.")
@@ -0,0 +1,56 @@
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+# One line of `python -X importtime` output:
+# "import time:   self [us] | cumulative | imported package"
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+def measure_imports(module):
+    """Import `module` in a fresh interpreter and return (name, self_us,
+    cumulative_us) for every module it loaded, in the order they finished."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True, text=True,
+        # Run from the repo so the app modules import wherever the report is started from
+        cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else f"Could not import {module}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us)))
+    return imports
+
+def main():
+    parser = argparse.ArgumentParser(description="Report where startup import time goes")
+    parser.add_argument('module', nargs='?', default='streamlit_app', help="Module to import (default: streamlit_app)")
+    parser.add_argument('--top', type=int, default=20, help="Number of modules to list")
+    parser.add_argument('--watch', nargs='*', default=['reportlab', 'openpyxl', 'psycopg2'],
+                        help="Packages that should not be imported at startup")
+    args = parser.parse_args()
+
+    imports = measure_imports(args.module)
+    total_us = sum(self_us for _, self_us, _ in imports)
+    print(f"{args.module}: {len(imports)} modules, {total_us / 1000:.1f} ms total import time\n")
+
+    print(f"{'cumulative ms':>14}  {'self ms':>8}  module")
+    for name, self_us, cumulative_us in sorted(imports, key=lambda i: i[2], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>14.1f}  {self_us / 1000:>8.1f}  {name}")
+
+    # Heavy packages that should only load on demand
+    loaded = {name.split('.')[0] for name, _, _ in imports}
+    eager = [package for package in args.watch if package in loaded]
+    if eager:
+        print(f"\nImported at startup but expected to load lazily: {', '.join(eager)}")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,176 @@
+import argparse
+import io
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pandas as pd
+
+OPERATIONS = ['browse', 'add_item', 'edit_quantity', 'import_catalog', 'export_pdf']
+
+def make_catalog(rows, seed):
+    """Synthetic catalog with the same columns as the import template."""
+    rng = random.Random(seed)
+    manufacturers = [f"Manufacturer {i}" for i in range(max(1, rows // 500))]
+    product_types = [f"Type {i}" for i in range(10)]
+    suppliers = ['', 'Supplier A', 'Supplier B', 'Supplier C']
+    return pd.DataFrame({
+        'manufacturer': [rng.choice(manufacturers) for _ in range(rows)],
+        'product_type': [rng.choice(product_types) for _ in range(rows)],
+        'description': [f"Product {i}" for i in range(rows)],
+        'product_code': [f"LT-{i:07d}" for i in range(rows)],
+        'unit_cost': [round(rng.uniform(1, 500), 2) for _ in range(rows)],
+        'supplier': [rng.choice(suppliers) for _ in range(rows)],
+        'discount': [rng.choice([0, 0, 5, 10, 15]) for _ in range(rows)]
+    })
+
+def run_user(user_id, options):
+    """One simulated estimator. Returns {operation: [(seconds, error), ...]},
+    where error is None for a success or a short description of the failure."""
+    # Imported here so process workers set up their own engine and caches
+    from data_manager import DataManager
+    from streamlit_app import add_item, create_pdf, mark_sheet_changed
+    from cost_items import summarize_sheet
+
+    rng = random.Random(options.seed + user_id)
+    data_manager = DataManager()
+    # Stands in for st.session_state, one per simulated browser session
+    state = SimpleNamespace(cost_items=[], groups=[], sheet_version=0)
+    samples = defaultdict(list)
+
+    def timed(operation, action):
+        # (success, message) results count as errors when success is False
+        start = time.perf_counter()
+        result = None
+        error = None
+        try:
+            result = action()
+            if isinstance(result, tuple) and result and result[0] is False:
+                error = str(result[1])
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        # One short line per failure, so identical failures group in the report
+        samples[operation].append((time.perf_counter() - start, ' '.join(error.split())[:200] if error else None))
+        return result
+
+    def browse():
+        # The dropdown chain a user walks before adding an item
+        manufacturer = rng.choice(data_manager.get_manufacturers())
+        product_type = rng.choice(data_manager.get_product_types(manufacturer))
+        description = rng.choice(data_manager.get_product_descriptions(manufacturer, product_type))
+        return data_manager.get_product_details_by_description(manufacturer, product_type, description)
+
+    def add(product):
+        add_item(
+            product['manufacturer'],
+            product['product_type'],
+            product['product_code'],
+            product['description'],
+            product['unit_cost'],
+            rng.randint(1, 10),
+            f"Group {rng.randint(1, options.groups)}",
+            product.get('supplier') or '',
+            product.get('discount', 0),
+            state=state
+        )
+
+    def edit_quantity():
+        # A data_editor quantity change followed by the summary the page recomputes
+        item = rng.choice(state.cost_items)
+        item.quantity = rng.randint(1, 50)
+        mark_sheet_changed(state)
+        return summarize_sheet(state.cost_items)
+
+    def import_catalog():
+        # Price update for a slice of the catalog, uploaded like a CSV file
+        update = make_catalog(options.import_rows, options.seed + user_id)
+        update['product_code'] = [f"LT-{rng.randrange(options.catalog_size):07d}" for _ in range(len(update))]
+        file = io.BytesIO(update.to_csv(index=False).encode())
+        file.name = 'catalog_update.csv'
+        return data_manager.import_catalog(file)
+
+    for iteration in range(options.iterations):
+        for _ in range(options.items_per_iteration):
+            product = timed('browse', browse)
+            if product:
+                timed('add_item', lambda: add(product))
+
+        if state.cost_items:
+            for _ in range(options.edits_per_iteration):
+                timed('edit_quantity', edit_quantity)
+            timed('export_pdf', lambda: create_pdf(f"Load test {user_id}", state.cost_items))
+
+        if options.import_every and iteration % options.import_every == options.import_every - 1:
+            timed('import_catalog', import_catalog)
+
+    data_manager.db.session.close()
+    return dict(samples)
+
+def report(samples, elapsed):
+    print(f"{'operation':<16}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'ops/s':>10}")
+    for operation in OPERATIONS:
+        if operation not in samples:
+            continue
+        durations = pd.Series([seconds for seconds, _ in samples[operation]]) * 1000
+        errors = sum(1 for _, error in samples[operation] if error)
+        p50, p95, p99 = durations.quantile([0.5, 0.95, 0.99])
+        print(f"{operation:<16}{len(durations):>8}{errors:>8}{p50:>10.1f}{p95:>10.1f}{p99:>10.1f}{len(durations) / elapsed:>10.1f}")
+    print(f"\nWall time: {elapsed:.1f} s")
+
+    errors = Counter(
+        (operation, error)
+        for operation, values in samples.items()
+        for _, error in values
+        if error
+    )
+    if errors:
+        print("\nErrors:")
+        for (operation, error), count in errors.most_common():
+            print(f"{count:>6}  {operation}: {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent estimators against a local database")
+    parser.add_argument('--users', type=int, default=10, help="Concurrent simulated users")
+    parser.add_argument('--mode', choices=['thread', 'process'], default='thread',
+                        help="Threads share one server process (like Streamlit); processes model several workers")
+    parser.add_argument('--iterations', type=int, default=5, help="Flows per user")
+    parser.add_argument('--items-per-iteration', type=int, default=5)
+    parser.add_argument('--edits-per-iteration', type=int, default=5)
+    parser.add_argument('--groups', type=int, default=4, help="Cost sheet groups per user")
+    parser.add_argument('--import-every', type=int, default=5, help="Import a catalog update every N flows (0 disables)")
+    parser.add_argument('--import-rows', type=int, default=500)
+    parser.add_argument('--catalog-size', type=int, default=10000, help="Products seeded before the run")
+    parser.add_argument('--database-url', default='sqlite:///load_test.db',
+                        help="Database to load; a local SQLite file or a PostgreSQL stand-in")
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args()
+
+    # Must be set before database.py creates its engine, and is inherited by workers
+    os.environ['DATABASE_URL'] = options.database_url
+    from database import DatabaseManager, get_engine
+
+    print(f"Seeding {options.catalog_size} products into {options.database_url}...")
+    with DatabaseManager() as db:
+        success, message = db.import_catalog(make_catalog(options.catalog_size, options.seed), bulk=True)
+    if not success:
+        print(message)
+        return 1
+    # Don't hand pooled connections to forked workers
+    get_engine().dispose()
+
+    print(f"Running {options.users} users ({options.mode} mode)...\n")
+    executor_class = ThreadPoolExecutor if options.mode == 'thread' else ProcessPoolExecutor
+    samples = defaultdict(list)
+    start = time.perf_counter()
+    with executor_class(max_workers=options.users) as executor:
+        for user_samples in executor.map(run_user, range(options.users), [options] * options.users):
+            for operation, values in user_samples.items():
+                samples[operation].extend(values)
+    report(samples, time.perf_counter() - start)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+
+class QueryCache:
+    """Process-wide cache of catalog query results.
+
+    Entries are keyed by (query name, parameters) and tagged with the catalog
+    version they were computed at. DatabaseManager bumps the version on every
+    write, which makes all older entries stale at once. Entries also expire
+    after `ttl` seconds (covering writes made by other processes), and the
+    least recently used entry is evicted once `maxsize` is reached.
+    Cached values are shared between sessions and must not be mutated.
+    """
+
+    def __init__(self, maxsize=256, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()  # key -> (version, stored_at, value)
+        self._lock = threading.Lock()
+        self._version = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def version(self):
+        return self._version
+
+    def bump_version(self):
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                version, stored_at, value = entry
+                if version == self._version and time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self._hits += 1
+                    return value
+                del self._entries[key]
+            self._misses += 1
+            version = self._version
+
+        # Run the query outside the lock so a slow scan doesn't block other keys
+        value = compute()
+
+        with self._lock:
+            # Don't store a result that a concurrent write has already invalidated
+            if version == self._version:
+                self._entries[key] = (version, time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    self._evictions += 1
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'hit_rate': self._hits / lookups if lookups else 0.0,
+                'evictions': self._evictions,
+                'size': len(self._entries),
+                'version': self._version
+            }
+
+# Shared by every session in this process
+catalog_cache = QueryCache()
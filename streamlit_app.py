@@ -1,33 +1,32 @@
 import streamlit as st
+from streamlit.errors import StreamlitAPIException
 import pandas as pd
 from data_manager import DataManager
-from database import DatabaseManager
+from cost_items import CostItem, items_to_dataframe, summarize_sheet
 import urllib.parse
 import io
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import A4, landscape
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
 import base64
 
 def initialize_session_state():
     if 'cost_items' not in st.session_state:
         st.session_state.cost_items = []
-    if 'total_cost' not in st.session_state:
-        st.session_state.total_cost = 0.0
-    if 'pre_discount_total' not in st.session_state:
-        st.session_state.pre_discount_total = 0.0
     if 'data_manager' not in st.session_state:
         st.session_state.data_manager = DataManager()
     if 'db_manager' not in st.session_state:
-        st.session_state.db_manager = DatabaseManager()
+        # Share the data manager's connection instead of opening a second session
+        st.session_state.db_manager = st.session_state.data_manager.db
     if 'project_name' not in st.session_state:
         st.session_state.project_name = ""
     if 'show_project_options' not in st.session_state:
         st.session_state.show_project_options = True
     if 'groups' not in st.session_state:  # Store custom groups
         st.session_state.groups = []
+    if 'sheet_version' not in st.session_state:
+        st.session_state.sheet_version = 0
+    if 'exports' not in st.session_state:  # Export files for the current sheet version
+        st.session_state.exports = {}
+    if 'sheet_summary' not in st.session_state:  # (sheet_version, SheetSummary)
+        st.session_state.sheet_summary = None
 
 def restore_project(uploaded_file):
     try:
@@ -39,28 +38,23 @@ def restore_project(uploaded_file):
             st.session_state.project_name = df['Project'].iloc[0]
             df = df.drop('Project', axis=1)
 
-        # Restore cost items
+        # Blank group cells fall back to 'Other' like files without a Group column
+        if 'Group' in df.columns:
+            df['Group'] = df['Group'].fillna('Other')
+
+        # Restore cost items; derived cost columns are recomputed on read
         for _, row in df.iterrows():
-            unit_cost = float(row['Unit Cost (£)'])
-            discount = float(row.get('Discount (%)', 0))  # Default to 0 if discount is missing
-            discounted_cost = unit_cost * (1 - discount / 100)  # Calculate discounted cost
-            total_cost = discounted_cost * int(row['Quantity'])  # Calculate total cost
-            pre_discount_total = unit_cost * int(row['Quantity'])  # Calculate pre-discount total
-
-            st.session_state.cost_items.append({
-                'Manufacturer': row['Manufacturer'],
-                'Product Type': row['Product Type'],
-                'Product Code': row['Product Code'],
-                'Description': row['Description'],
-                'Unit Cost (£)': unit_cost,
-                'Discount (%)': discount,
-                'Discounted Cost (£)': discounted_cost,
-                'Quantity': int(row['Quantity']),
-                'Total (£)': total_cost,
-                'Pre-Discount Total (£)': pre_discount_total,
-                'Group': row.get('Group', 'Other'),  # Restore group if it exists
-                'Supplier': row.get('Supplier', '')  # Restore supplier if it exists
-            })
+            st.session_state.cost_items.append(CostItem(
+                manufacturer=row['Manufacturer'],
+                product_type=row['Product Type'],
+                product_code=row['Product Code'],
+                description=row['Description'],
+                unit_cost=float(row['Unit Cost (£)']),
+                discount=float(row.get('Discount (%)', 0)),  # Default to 0 if discount is missing
+                quantity=int(row['Quantity']),
+                group=row.get('Group', 'Other'),  # Restore group if it exists
+                supplier=row.get('Supplier', '')  # Restore supplier if it exists
+            ))
 
         # Update groups in session state
         groups_in_file = df['Group'].unique().tolist() if 'Group' in df.columns else []
@@ -68,59 +62,49 @@ def restore_project(uploaded_file):
             if group not in st.session_state.groups:
                 st.session_state.groups.append(group)
 
-        # Calculate totals
-        st.session_state.total_cost = sum(item['Total (£)'] for item in st.session_state.cost_items)
-        st.session_state.pre_discount_total = sum(item['Pre-Discount Total (£)'] for item in st.session_state.cost_items)
         st.session_state.show_project_options = False
+        mark_sheet_changed()
         return True, "Project restored successfully"
     except Exception as e:
         return False, f"Error restoring project: {str(e)}"
 
-def add_item(manufacturer, product_type, product_code, description, unit_cost, quantity, group, supplier, discount):
+def add_item(manufacturer, product_type, product_code, description, unit_cost, quantity, group, supplier, discount, state=None):
+    # `state` defaults to the Streamlit session; the load test passes its own per-user state
+    state = st.session_state if state is None else state
+
     # Check if item already exists in cost sheet
     existing_item = None
-    for item in st.session_state.cost_items:
-        if (item['Manufacturer'] == manufacturer and 
-            item['Product Type'] == product_type and 
-            item['Product Code'] == product_code and
-            item['Group'] == group and
-            item['Supplier'] == supplier):  # Check supplier as well
+    for item in state.cost_items:
+        if (item.manufacturer == manufacturer and 
+            item.product_type == product_type and 
+            item.product_code == product_code and
+            item.group == group and
+            item.supplier == supplier):  # Check supplier as well
             existing_item = item
             break
 
     if existing_item:
         # Update existing item
-        existing_item['Quantity'] += quantity
-        existing_item['Total (£)'] = float(existing_item['Discounted Cost (£)'] * existing_item['Quantity'])
-        existing_item['Pre-Discount Total (£)'] = float(existing_item['Unit Cost (£)'] * existing_item['Quantity'])
+        existing_item.quantity += quantity
+        mark_sheet_changed(state)
     else:
         # Add new item
-        discounted_cost = unit_cost * (1 - discount / 100)  # Calculate discounted cost
-        total = discounted_cost * quantity  # Calculate total cost
-        pre_discount_total = unit_cost * quantity  # Calculate pre-discount total
-
-        st.session_state.cost_items.append({
-            'Manufacturer': manufacturer,
-            'Product Type': product_type,
-            'Product Code': product_code,
-            'Description': description,
-            'Unit Cost (£)': float(unit_cost),
-            'Discount (%)': float(discount),
-            'Discounted Cost (£)': float(discounted_cost),
-            'Quantity': quantity,
-            'Total (£)': float(total),
-            'Pre-Discount Total (£)': float(pre_discount_total),
-            'Group': group,  # Add group field
-            'Supplier': supplier  # Add supplier field
-        })
+        state.cost_items.append(CostItem(
+            manufacturer=manufacturer,
+            product_type=product_type,
+            product_code=product_code,
+            description=description,
+            unit_cost=float(unit_cost),
+            discount=float(discount),
+            quantity=quantity,
+            group=group,
+            supplier=supplier
+        ))
+        mark_sheet_changed(state)
 
         # Add group to session state if it doesn't exist
-        if group not in st.session_state.groups:
-            st.session_state.groups.append(group)
-
-    # Recalculate total cost and pre-discount total
-    st.session_state.total_cost = sum(item['Total (£)'] for item in st.session_state.cost_items)
-    st.session_state.pre_discount_total = sum(item['Pre-Discount Total (£)'] for item in st.session_state.cost_items)
+        if group not in state.groups:
+            state.groups.append(group)
 
 def generate_google_search_url(manufacturer, product_code, description):
     # Construct a search query using manufacturer, product code, and description
@@ -128,7 +112,16 @@ def generate_google_search_url(manufacturer, product_code, description):
     encoded_query = urllib.parse.quote_plus(query)
     return f"https://www.google.com/search?q={encoded_query}"
 
-def create_pdf(project_name, cost_items, total_cost, pre_discount_total):
+def create_pdf(project_name, cost_items, summary=None):
+    # ReportLab is only needed here, so keep it off the startup path
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import inch
+
+    if summary is None:
+        summary = summarize_sheet(cost_items)
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), leftMargin=20, rightMargin=20, topMargin=20, bottomMargin=20)
     elements = []
@@ -162,21 +155,10 @@ def create_pdf(project_name, cost_items, total_cost, pre_discount_total):
         elements.append(Paragraph("Cost Estimation", title_style))
     elements.append(Spacer(1, 0.25*inch))
 
-    # Group items by group
+    # Group items by group; totals come from the summary
     grouped_items = {}
-    group_totals = {}
-    group_pre_discount_totals = {}
-
     for item in cost_items:
-        group = item['Group']
-        if group not in grouped_items:
-            grouped_items[group] = []
-            group_totals[group] = 0
-            group_pre_discount_totals[group] = 0
-
-        grouped_items[group].append(item)
-        group_totals[group] += item['Total (£)']
-        group_pre_discount_totals[group] += item['Pre-Discount Total (£)']
+        grouped_items.setdefault(item.group, []).append(item)
 
     # Create a paragraph style for table cells that enables wrapping
     cell_style = ParagraphStyle(
@@ -203,19 +185,19 @@ def create_pdf(project_name, cost_items, total_cost, pre_discount_total):
 
         for item in items:
             # Convert description to Paragraph to enable wrapping
-            desc_paragraph = Paragraph(item['Description'], cell_style)
+            desc_paragraph = Paragraph(item.description, cell_style)
 
             # Create paragraphs for numeric values to ensure proper alignment
-            unit_cost = Paragraph(f"{item['Unit Cost (£)']:.2f}", cell_style)
-            discount = Paragraph(f"{item['Discount (%)']:.2f}", cell_style)
-            discounted = Paragraph(f"{item['Discounted Cost (£)']:.2f}", cell_style)
-            quantity = Paragraph(str(item['Quantity']), cell_style)
-            total = Paragraph(f"{item['Total (£)']:.2f}", cell_style)
-            pre_disc_total = Paragraph(f"{item['Pre-Discount Total (£)']:.2f}", cell_style)
+            unit_cost = Paragraph(f"{item.unit_cost:.2f}", cell_style)
+            discount = Paragraph(f"{item.discount:.2f}", cell_style)
+            discounted = Paragraph(f"{item.discounted_cost:.2f}", cell_style)
+            quantity = Paragraph(str(item.quantity), cell_style)
+            total = Paragraph(f"{item.total:.2f}", cell_style)
+            pre_disc_total = Paragraph(f"{item.pre_discount_total:.2f}", cell_style)
 
             # Other values as paragraphs too for consistent styling
-            product_code = Paragraph(item['Product Code'], cell_style)
-            manufacturer = Paragraph(item['Manufacturer'], cell_style)
+            product_code = Paragraph(item.product_code, cell_style)
+            manufacturer = Paragraph(item.manufacturer, cell_style)
 
             data.append([
                 product_code,
@@ -230,8 +212,9 @@ def create_pdf(project_name, cost_items, total_cost, pre_discount_total):
             ])
 
         # Add group summary row
-        group_total = Paragraph(f"{group_totals[group]:.2f}", ParagraphStyle('TotalStyle', parent=cell_style, fontName='Helvetica-Bold'))
-        group_pre_disc = Paragraph(f"{group_pre_discount_totals[group]:.2f}", ParagraphStyle('TotalStyle', parent=cell_style, fontName='Helvetica-Bold'))
+        group_row = summary.by_group.loc[group]
+        group_total = Paragraph(f"{group_row['Total (£)']:.2f}", ParagraphStyle('TotalStyle', parent=cell_style, fontName='Helvetica-Bold'))
+        group_pre_disc = Paragraph(f"{group_row['Pre-Discount Total (£)']:.2f}", ParagraphStyle('TotalStyle', parent=cell_style, fontName='Helvetica-Bold'))
         group_total_label = Paragraph("Group Total:", ParagraphStyle('TotalStyle', parent=cell_style, fontName='Helvetica-Bold'))
 
         data.append([
@@ -282,15 +265,11 @@ def create_pdf(project_name, cost_items, total_cost, pre_discount_total):
     elements.append(Spacer(1, 0.1*inch))
     elements.append(Paragraph("Overall Totals", subtitle_style))
 
-    # Total savings calculation
-    total_savings = pre_discount_total - total_cost
-    savings_percentage = (total_savings / pre_discount_total * 100) if pre_discount_total > 0 else 0
-
     # Create totals table with Paragraphs for consistent styling
     totals_data = [
-        [Paragraph("Total Cost (After Discounts)", cell_style), Paragraph(f"£{total_cost:,.2f}", cell_style)],
-        [Paragraph("Pre-Discount Total Cost", cell_style), Paragraph(f"£{pre_discount_total:,.2f}", cell_style)],
-        [Paragraph("Total Savings", cell_style), Paragraph(f"£{total_savings:,.2f} ({savings_percentage:.1f}%)", cell_style)]
+        [Paragraph("Total Cost (After Discounts)", cell_style), Paragraph(f"£{summary.total:,.2f}", cell_style)],
+        [Paragraph("Pre-Discount Total Cost", cell_style), Paragraph(f"£{summary.pre_discount_total:,.2f}", cell_style)],
+        [Paragraph("Total Savings", cell_style), Paragraph(f"£{summary.savings:,.2f} ({summary.savings_percentage:.1f}%)", cell_style)]
     ]
 
     totals_table = Table(totals_data, colWidths=[3*inch, 2*inch])
@@ -304,6 +283,29 @@ def create_pdf(project_name, cost_items, total_cost, pre_discount_total):
 
     elements.append(totals_table)
 
+    # Supplier breakdown
+    elements.append(Spacer(1, 0.2*inch))
+    elements.append(Paragraph("Totals by Supplier", subtitle_style))
+    supplier_data = [[Paragraph(header, ParagraphStyle('HeaderStyle', parent=cell_style, fontName='Helvetica-Bold'))
+                      for header in ["Supplier", "Items", "Total (£)", "Pre-Disc Total (£)", "Savings (£)"]]]
+    for supplier, row in summary.by_supplier.iterrows():
+        supplier_data.append([
+            Paragraph(supplier or "(none)", cell_style),
+            Paragraph(str(int(row['Items'])), cell_style),
+            Paragraph(f"{row['Total (£)']:,.2f}", cell_style),
+            Paragraph(f"{row['Pre-Discount Total (£)']:,.2f}", cell_style),
+            Paragraph(f"{row['Savings (£)']:,.2f}", cell_style)
+        ])
+
+    supplier_table = Table(supplier_data, repeatRows=1, colWidths=[3*inch, 0.8*inch, 1.4*inch, 1.4*inch, 1.4*inch])
+    supplier_table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+        ('BOX', (0, 0), (-1, -1), 0.5, colors.black),
+        ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+    ]))
+    elements.append(supplier_table)
+
     # Add generated date
     elements.append(Spacer(1, 0.5*inch))
     elements.append(Paragraph(f"Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M')}", normal_style))
@@ -321,34 +323,32 @@ def get_download_link_for_pdf(pdf, filename):
     return href
     
 
-def main():
-    st.title("Project Cost Estimation Tool")
-
-    initialize_session_state()
-    data_manager = st.session_state.data_manager
-    db_manager = st.session_state.db_manager
-
-    if st.session_state.show_project_options:
-        st.write("Welcome! Please choose an option:")
-        col1, col2 = st.columns(2)
-
-        with col1:
-            if st.button("Create New Project"):
-                st.session_state.show_project_options = False
-                st.rerun()
-
-        with col2:
-            uploaded_file = st.file_uploader("Restore Existing Project", type=['csv'])
-            if uploaded_file is not None:
-                success, message = restore_project(uploaded_file)
-                if success:
-                    st.success(message)
-                    st.rerun()
-                else:
-                    st.error(message)
-
-        st.stop()
+def mark_sheet_changed(state=None):
+    # Bumped on every cost sheet mutation; fragments use it to tell stale output
+    state = st.session_state if state is None else state
+    state.sheet_version += 1
 
+def rerun_cost_sheet():
+    # Rerun only the cost sheet fragment; an edit picked up during a full
+    # script run (e.g. right after another widget's rerun) needs a full rerun
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def get_sheet_summary():
+    # Shared by the group expanders, totals and exports; recomputed once per sheet version
+    cached = st.session_state.sheet_summary
+    if cached is None or cached[0] != st.session_state.sheet_version:
+        cached = (st.session_state.sheet_version, summarize_sheet(st.session_state.cost_items))
+        st.session_state.sheet_summary = cached
+    return cached[1]
+
+def safe_file_stem(project_name):
+    # Remove any special characters that could cause issues
+    return "".join(c for c in project_name if c.isalnum() or c in (' ', '_', '-'))
+
+def catalog_management(data_manager, db_manager):
     # Catalog Management Section with tabs
     st.sidebar.title("Catalog Management")
     catalog_action = st.sidebar.radio(
@@ -402,13 +402,29 @@ def main():
                 uploaded_file = st.sidebar.file_uploader("Choose a file", type=['xlsx', 'csv'])
 
                 if uploaded_file is not None:
-                    success, message = data_manager.import_catalog(uploaded_file)
+                    # Import each upload once, not again on every rerun while it stays attached
+                    if st.session_state.get('imported_file_id') != uploaded_file.file_id:
+                        st.session_state.import_result = data_manager.import_catalog(uploaded_file)
+                        st.session_state.imported_file_id = uploaded_file.file_id
+                    success, message = st.session_state.import_result
                     if success:
                         st.sidebar.success(message)
                     else:
                         st.sidebar.error(message)
 
-    # Main content area - Product Selection and Cost Sheet
+                    if not data_manager.rejected_rows.empty:
+                        st.sidebar.warning(f"{len(data_manager.rejected_rows)} rows were not imported")
+                        st.sidebar.download_button(
+                            "Download Rejected Rows",
+                            data_manager.rejected_rows.to_csv(index=False),
+                            "catalog_import_rejects.csv",
+                            "text/csv",
+                            key='download-rejects'
+                        )
+
+@st.fragment
+def product_picker(data_manager):
+    # Dropdown changes rerun only this fragment, not the cost sheet or exports
     st.subheader("Add New Item")
     col1, col2 = st.columns(2)
 
@@ -496,6 +512,7 @@ def main():
                                 product_details.get('supplier', ''),  # Pass supplier to add_item
                                 product_details.get('discount', 0)  # Pass discount to add_item
                             )
+                            # The sheet changed, so everything below the picker needs a full rerun
                             st.rerun()
 
                 with col2:
@@ -511,153 +528,188 @@ def main():
                         unsafe_allow_html=True
                     )
 
-    # Cost sheet display
-    if st.session_state.cost_items:
-        st.subheader("Cost Sheet")
-
-        # Group items by their 'Group' field
-        grouped_items = {}
-        group_totals = {}
-        group_pre_discount_totals = {}
-
-        for item in st.session_state.cost_items:
-            group = item['Group']
-            if group not in grouped_items:
-                grouped_items[group] = []
-                group_totals[group] = 0
-                group_pre_discount_totals[group] = 0
-
-            grouped_items[group].append(item)
-            group_totals[group] += item['Total (£)']
-            group_pre_discount_totals[group] += item['Pre-Discount Total (£)']
-
-        # Display each group in an expander
-        for group, items in grouped_items.items():
-            with st.expander(f"Group: {group} - Total: £{group_totals[group]:,.2f} | Pre-Discount Total: £{group_pre_discount_totals[group]:,.2f}"):
-                # Create a DataFrame for the group
-                df = pd.DataFrame(items)
-
-                # Add a "Delete" button for each row
-                df["Delete"] = False  # Add a column for the delete checkbox
-
-                # Display the DataFrame with an editable "Quantity" column
-                edited_df = st.data_editor(
-                    df,
-                    column_config={
-                        "Quantity": st.column_config.NumberColumn(
-                            "Quantity",
-                            min_value=1,
-                            step=1,
-                        ),
-                        "Delete": st.column_config.CheckboxColumn(
-                            "Delete?",
-                            help="Check to delete this item",
-                            default=False,
-                        ),
-                    },
-                    hide_index=True,
-                    disabled=["Manufacturer", "Product Type", "Product Code", "Description", "Unit Cost (£)", "Discount (%)", 
-                             "Discounted Cost (£)", "Total (£)", "Pre-Discount Total (£)", "Group", "Supplier"]
+def cost_sheet_group(group):
+    items = [item for item in st.session_state.cost_items if item.group == group]
+    if not items:
+        return
+    group_row = get_sheet_summary().by_group.loc[group]
+
+    with st.expander(f"Group: {group} - Total: £{group_row['Total (£)']:,.2f} | Pre-Discount Total: £{group_row['Pre-Discount Total (£)']:,.2f}"):
+        # Create a DataFrame for the group
+        df = items_to_dataframe(items)
+
+        # Add a "Delete" button for each row
+        df["Delete"] = False  # Add a column for the delete checkbox
+
+        # Display the DataFrame with an editable "Quantity" column
+        edited_df = st.data_editor(
+            df,
+            column_config={
+                "Quantity": st.column_config.NumberColumn(
+                    "Quantity",
+                    min_value=1,
+                    step=1,
+                    required=True,
+                ),
+                "Delete": st.column_config.CheckboxColumn(
+                    "Delete?",
+                    help="Check to delete this item",
+                    default=False,
+                ),
+            },
+            hide_index=True,
+            disabled=["Manufacturer", "Product Type", "Product Code", "Description", "Unit Cost (£)", "Discount (%)", 
+                     "Discounted Cost (£)", "Total (£)", "Pre-Discount Total (£)", "Group", "Supplier"]
+        )
+
+        # Handle deletions
+        if st.button(f"Delete Selected Items in {group}", key=f"delete_{group}"):
+            # Filter out items marked for deletion
+            to_delete = [item for item, delete in zip(items, edited_df["Delete"]) if delete]
+            st.session_state.cost_items = [item for item in st.session_state.cost_items if not any(item is d for d in to_delete)]
+            mark_sheet_changed()
+            rerun_cost_sheet()
+
+        # Update quantities for the group; editor rows are in the same order as items
+        changed = False
+        for item, quantity in zip(items, edited_df["Quantity"]):
+            # Only update if quantity changed; ignore a cell that was cleared
+            if not pd.isna(quantity) and item.quantity != quantity:
+                item.quantity = int(quantity)
+                changed = True
+        if changed:
+            mark_sheet_changed()
+            rerun_cost_sheet()
+
+def totals_panel():
+    summary = get_sheet_summary()
+
+    # Display overall totals
+    st.subheader("Overall Totals")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write(f"Total Cost (After Discounts): £{summary.total:,.2f}")
+    with col2:
+        st.write(f"Pre-Discount Total Cost: £{summary.pre_discount_total:,.2f}")
+
+    st.write(f"Total Savings: £{summary.savings:,.2f} ({summary.savings_percentage:.1f}%)")
+
+    with st.expander("Breakdown by Supplier and Manufacturer"):
+        money = st.column_config.NumberColumn(format="£%.2f")
+        money_columns = {col: money for col in ['Total (£)', 'Pre-Discount Total (£)', 'Savings (£)']}
+        st.dataframe(summary.by_supplier, column_config=money_columns)
+        st.dataframe(summary.by_manufacturer, column_config=money_columns)
+
+    if st.button("Clear Cost Sheet"):
+        st.session_state.cost_items = []
+        mark_sheet_changed()
+        rerun_cost_sheet()
+
+def export_panel():
+    # Export files are kept until the sheet or project name changes
+    col1, col2 = st.columns(2)
+    with col1:
+        project_name = st.text_input("Project Name", value=st.session_state.project_name, key="project_name_input").strip()
+        st.session_state.project_name = project_name
+
+    exports = st.session_state.exports
+    export_key = (st.session_state.sheet_version, project_name)
+    if exports.get('key') != export_key:
+        exports.clear()
+        exports['key'] = export_key
+
+    filename_stem = f"{safe_file_stem(project_name)}_estimation" if project_name else "cost_estimation"
+
+    with col1:
+        try:
+            if 'csv' not in exports:
+                df = items_to_dataframe(st.session_state.cost_items)
+                # Reorder columns to place 'Group' as the first column
+                columns_order = ['Group', 'Supplier'] + [col for col in df.columns if col not in ['Group', 'Supplier']]
+                exports['csv'] = df[columns_order].to_csv(index=False)
+
+            st.download_button(
+                "Export to CSV",
+                exports['csv'],
+                f"{filename_stem}.csv",
+                "text/csv",
+                key='download-csv'
+            )
+        except Exception as e:
+            st.error(f"Error preparing export: {str(e)}")
+
+    with col2:
+        try:
+            # Rendering a PDF (and loading ReportLab) only happens on request
+            if 'pdf' not in exports and st.button("Prepare PDF"):
+                exports['pdf'] = create_pdf(
+                    project_name,
+                    st.session_state.cost_items,
+                    get_sheet_summary()
+                ).getvalue()
+
+            if 'pdf' in exports:
+                st.download_button(
+                    "Export to PDF",
+                    exports['pdf'],
+                    f"{filename_stem}.pdf",
+                    "application/pdf",
+                    key='download-pdf'
                 )
+        except Exception as e:
+            st.error(f"Error generating PDF: {str(e)}")
 
-                # Handle deletions
-                if st.button(f"Delete Selected Items in {group}", key=f"delete_{group}"):
-                    # Filter out items marked for deletion
-                    items_to_keep = [item for item, to_delete in zip(items, edited_df["Delete"]) if not to_delete]
-                    st.session_state.cost_items = [item for item in st.session_state.cost_items if item not in items or item in items_to_keep]
-                    st.session_state.total_cost = sum(item['Total (£)'] for item in st.session_state.cost_items)
-                    st.session_state.pre_discount_total = sum(item['Pre-Discount Total (£)'] for item in st.session_state.cost_items)
-                    st.success(f"Deleted selected items in {group}!")
-                    st.rerun()
+@st.fragment
+def cost_sheet():
+    # Sheet edits (quantities, deletions, clearing, project name) rerun only
+    # this fragment, so the picker, sidebar and catalog lookups stay untouched
+    if not st.session_state.cost_items:
+        return
 
-                # Update quantities for the group
-                for i, row in edited_df.iterrows():
-                    for item in st.session_state.cost_items:
-                        if item['Product Code'] == row['Product Code'] and item['Group'] == group:
-                            if item['Quantity'] != row['Quantity']:  # Only update if quantity changed
-                                item['Quantity'] = row['Quantity']
-                                item['Total (£)'] = row['Quantity'] * item['Discounted Cost (£)']
-                                item['Pre-Discount Total (£)'] = row['Quantity'] * item['Unit Cost (£)']
-
-                # Recalculate totals
-                st.session_state.total_cost = sum(item['Total (£)'] for item in st.session_state.cost_items)
-                st.session_state.pre_discount_total = sum(item['Pre-Discount Total (£)'] for item in st.session_state.cost_items)
-
-        # Display overall totals
-        st.subheader("Overall Totals")
-        col1, col2 = st.columns(2)
-        with col1:
-            st.write(f"Total Cost (After Discounts): £{st.session_state.total_cost:,.2f}")
-        with col2:
-            st.write(f"Pre-Discount Total Cost: £{st.session_state.pre_discount_total:,.2f}")
+    st.subheader("Cost Sheet")
+
+    # Display each group in order of first appearance
+    for group in dict.fromkeys(item.group for item in st.session_state.cost_items):
+        cost_sheet_group(group)
+
+    totals_panel()
+    export_panel()
+
+def main():
+    st.title("Project Cost Estimation Tool")
+
+    initialize_session_state()
+    data_manager = st.session_state.data_manager
+    db_manager = st.session_state.db_manager
 
-        # Calculate total savings
-        total_savings = st.session_state.pre_discount_total - st.session_state.total_cost
-        savings_percentage = (total_savings / st.session_state.pre_discount_total * 100) if st.session_state.pre_discount_total > 0 else 0
-        st.write(f"Total Savings: £{total_savings:,.2f} ({savings_percentage:.1f}%)")
+    if st.session_state.show_project_options:
+        st.write("Welcome! Please choose an option:")
+        col1, col2 = st.columns(2)
 
-        col1, col2, col3 = st.columns(3)
         with col1:
-            if st.button("Clear Cost Sheet"):
-                st.session_state.cost_items = []
-                st.session_state.total_cost = 0.0
-                st.session_state.pre_discount_total = 0.0
+            if st.button("Create New Project"):
+                st.session_state.show_project_options = False
                 st.rerun()
 
         with col2:
-            if st.session_state.cost_items:
-                project_name = st.text_input("Project Name", value=st.session_state.project_name, key="project_name_input").strip()
-                st.session_state.project_name = project_name
-
-                df = pd.DataFrame(st.session_state.cost_items)
-                try:
-                    # Reorder columns to place 'Group' as the first column
-                    columns_order = ['Group', 'Supplier'] + [col for col in df.columns if col not in ['Group', 'Supplier']]
-                    df = df[columns_order]
-
-                    # Export to CSV
-                    csv = df.to_csv(index=False)
-                    filename = "cost_estimation.csv"
-                    if project_name:
-                        # Remove any special characters that could cause issues
-                        safe_project_name = "".join(c for c in project_name if c.isalnum() or c in (' ', '_', '-'))
-                        filename = f"{safe_project_name}_estimation.csv"
-
-                    st.download_button(
-                        "Export to CSV",
-                        csv,
-                        filename,
-                        "text/csv",
-                        key='download-csv'
-                    )
-                except Exception as e:
-                    st.error(f"Error preparing export: {str(e)}")
-
-        with col3:
-            if st.session_state.cost_items:
-                # Generate PDF export
-                pdf_filename = "cost_estimation.pdf"
-                if st.session_state.project_name:
-                    safe_project_name = "".join(c for c in st.session_state.project_name if c.isalnum() or c in (' ', '_', '-'))
-                    pdf_filename = f"{safe_project_name}_estimation.pdf"
-
-                try:
-                    pdf_buffer = create_pdf(
-                        st.session_state.project_name,
-                        st.session_state.cost_items,
-                        st.session_state.total_cost,
-                        st.session_state.pre_discount_total
-                    )
+            uploaded_file = st.file_uploader("Restore Existing Project", type=['csv'])
+            if uploaded_file is not None:
+                success, message = restore_project(uploaded_file)
+                if success:
+                    st.success(message)
+                    st.rerun()
+                else:
+                    st.error(message)
 
-                    st.download_button(
-                        "Export to PDF",
-                        pdf_buffer,
-                        pdf_filename,
-                        "application/pdf",
-                        key='download-pdf'
-                    )
-                except Exception as e:
-                    st.error(f"Error generating PDF: {str(e)}")
+        st.stop()
+
+    catalog_management(data_manager, db_manager)
+
+    # Main content area - Product Selection and Cost Sheet
+    product_picker(data_manager)
+
+    # Cost sheet display
+    cost_sheet()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()